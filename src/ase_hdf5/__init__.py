@@ -1,5 +1,5 @@
 from ase_hdf5.core import ASEH5Trajectory
-from ase_hdf5.utils import get_file_size
+from ase_hdf5.utils import get_file_size, human_readable_size
 
-__all__ = ["ASEH5Trajectory", "get_file_size"]
+__all__ = ["ASEH5Trajectory", "get_file_size", "human_readable_size"]
 __version__ = "0.1.6"
@@ -1,12 +1,29 @@
 from __future__ import annotations
 
+import functools
+import os
 import warnings
+import zlib
+from collections.abc import Iterator
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
 
 import ase
+import ase.cell
 import h5py
 import numpy as np
 
+# target size in bytes of a single chunk of a per-frame dataset.
+CHUNK_BYTES = 1024**2
+
+# number of hash slots in each chunk cache, a prime roughly 100 times the
+# number of chunks that fit in the default cache, to keep collisions rare.
+CHUNK_CACHE_SLOTS = 10007
+
+# types of the Atoms attributes that are copied when cloning frames.
+CONTAINERS = (dict, list, np.ndarray, ase.cell.Cell)
+
 
 class ASEH5Trajectory:
     def __init__(
@@ -14,6 +31,8 @@ class ASEH5Trajectory:
         immutable: list[str] | None = None,
         mutable: list[str] | None = None,
         info_keys: list[str] | None = None,
+        dtype_overrides: dict[str, str | np.dtype] | None = None,
+        chunk_cache_size: int = 64 * 1024**2,
     ) -> None:
         """
         Parameters
@@ -24,18 +43,23 @@ class ASEH5Trajectory:
             List of mutable properties to write to the HDF5 file.
         info_keys
             List of per-frame info keys to write to the HDF5 file.
+        dtype_overrides
+            Mapping from property (including "cell") to the floating point
+            type it is stored as, overriding the float_type passed to write.
+        chunk_cache_size
+            Size in bytes of the HDF5 chunk cache of each dataset when reading
+            and writing files.
         """
 
-        default_immutable = ["numbers"]
-        default_mutable = ["positions"]
-
-        # merge defaults with provided lists
-        immutable = (immutable or []) + default_immutable
-        mutable = (mutable or []) + default_mutable
+        # merge defaults with provided keys
+        immutable = (*(immutable or ()), "numbers")
+        mutable = (*(mutable or ()), "positions")
 
         # Validate keys
         self.immutable, self.mutable = validate_keys(immutable, mutable)
         self.info_keys = info_keys or []
+        self.dtype_overrides = dtype_overrides or {}
+        self.chunk_cache_size = chunk_cache_size
 
     def write(
         self,
@@ -43,6 +67,9 @@ class ASEH5Trajectory:
         filename: Path | str,
         compression: str = "gzip",
         float_type: str = "float32",
+        chunks: int | str | None = "auto",
+        shuffle: bool = True,
+        compression_opts: int | None = None,
     ) -> None:
         """
         Write a list of ASE Atoms objects to an HDF5 file.
@@ -66,29 +93,53 @@ class ASEH5Trajectory:
             Path to the HDF5 file to write to.
         compression
             Compression algorithm to use when writing the HDF5 file.
+        float_type
+            Floating point type to store float data as.
+        chunks
+            Number of frames stored per chunk of each per-frame dataset. If
+            "auto", the number of frames is chosen such that each chunk is
+            roughly 1 MB. If None, the chunk shape is left to h5py.
+        shuffle
+            Whether to apply the HDF5 shuffle filter before compressing, which
+            groups bytes of equal significance and typically improves the
+            compression of float data. Ignored if compression is None.
+        compression_opts
+            Options of the compression algorithm, e.g. the gzip level from 0 to
+            9. Lower levels write faster at the cost of larger files. If None,
+            the h5py default is used.
 
         Raises
         ------
         ValueError
-            If a mutable property is missing in any frame.
+            If a mutable property is missing in any frame, if its shape in any
+            frame differs from its shape in the first frame, or if its values
+            in any frame cannot be stored in the type chosen from all frames
+            without changing kind (e.g. strings in a frame after numbers).
         """
 
-        filename = Path(filename)
+        float_dtypes = {
+            key: np.dtype(self.dtype_overrides.get(key, float_type))
+            for key in (*self.immutable, *self.mutable, "cell")
+        }
 
-        float_dtype = np.dtype(float_type)
+        filters = {
+            "compression": compression,
+            "compression_opts": compression_opts,
+            "shuffle": shuffle and compression is not None,
+        }
 
-        with h5py.File(filename, "w") as h5file:
+        with self._open(filename, "w") as h5file:
             first_atoms = atoms_list[0]
 
             # handle immutable properties.
             for key in self.immutable:
-                data = first_atoms.arrays.get(key, first_atoms.info.get(key))
+                data = get_property(first_atoms, key)
                 if data is not None:
                     check_immutable_consistency(atoms_list, key, data)
                     h5file.create_dataset(
                         f"immutable/{key}",
-                        data=convert_dtype(data, float_dtype),
-                        compression=compression,
+                        data=convert_dtype(data, float_dtypes[key]),
+                        **filters,
                     )
                 else:
                     raise ValueError(
@@ -96,49 +147,123 @@ class ASEH5Trajectory:
                     )
 
             # handle mutable properties.
+            n_frames = len(atoms_list)
+            buffers = {}
             for key in self.mutable:
-                frame_data = []
-                for atoms in atoms_list:
-                    data = atoms.arrays.get(key, atoms.info.get(key))
+                first = get_property(first_atoms, key)
+                if first is None:
+                    raise ValueError(
+                        f"Mutable property '{key}' missing in a frame."
+                    )
+                first = np.asarray(convert_dtype(first, float_dtypes[key]))
+                dtype = first.dtype
+                if dtype.kind in "biuS":
+                    # strings are stored with the widest length of any frame,
+                    # and integers are promoted if any frame holds floats.
+                    for atoms in atoms_list[1:]:
+                        data = get_property(atoms, key)
+                        if data is None:
+                            continue
+                        data = convert_dtype(data, float_dtypes[key])
+                        other = np.asarray(data).dtype
+                        if (other.kind == "S") == (dtype.kind == "S"):
+                            dtype = np.result_type(dtype, other)
+                    if dtype.kind == "f":
+                        dtype = float_dtypes[key]
+                shape = (n_frames,) + first.shape
+                dset = h5file.create_dataset(
+                    f"mutable/{key}",
+                    shape=shape,
+                    dtype=dtype,
+                    chunks=frame_chunks(shape, dtype.itemsize, chunks),
+                    **filters,
+                )
+                buffers[key] = FrameBuffer(dset)
+
+            # numeric data is cast while being copied into the buffers, so
+            # only strings need converting beforehand. Everything needed per
+            # key is looked up once, outside the frame loop.
+            fills = [
+                (
+                    key,
+                    buffer.append,
+                    buffer.buffer.dtype.kind in "biufc",
+                    float_dtypes[key],
+                )
+                for key, buffer in buffers.items()
+            ]
+
+            # fill all mutable datasets in a single pass over the frames.
+            for atoms in atoms_list:
+                get_array, get_info = atoms.arrays.get, atoms.info.get
+                for key, append, numeric, dtype in fills:
+                    data = get_array(key)
+                    if data is None:
+                        data = get_info(key)
                     if data is None:
                         raise ValueError(
                             f"Mutable property '{key}' missing in a frame."
                         )
-                    frame_data.append(convert_dtype(data, float_dtype))
-                stacked_data = np.stack(frame_data, axis=0)
-                h5file.create_dataset(
-                    f"mutable/{key}", data=stacked_data, compression=compression
-                )
+                    append(data if numeric else convert_dtype(data, dtype))
 
-            # get the cell data.
-            cells = np.stack(
-                [atoms.cell.array for atoms in atoms_list],
-                axis=0,
-                dtype=float_dtype,
-            )
-            if np.all(np.isclose(cells, cells[0])):
+            for buffer in buffers.values():
+                buffer.flush()
+
+            # the cell is only stored per-frame if it changes between frames,
+            # which is checked with one comparison over all stacked cells.
+            float_dtype = float_dtypes["cell"]
+            cells = np.array([atoms.cell.array for atoms in atoms_list])
+            if cells_equal(cells, cells[0]):
                 h5file.create_dataset(
-                    "immutable/cell", data=cells[0], compression=compression
+                    "immutable/cell",
+                    data=cells[0].astype(float_dtype),
+                    **filters,
                 )
             else:
                 h5file.create_dataset(
-                    "mutable/cell", data=cells, compression=compression
+                    "mutable/cell",
+                    data=cells.astype(float_dtype),
+                    chunks=frame_chunks(
+                        cells.shape, float_dtype.itemsize, chunks
+                    ),
+                    **filters,
                 )
 
             # other per-frame info.
             for key in self.info_keys:
-                data = np.array(
-                    [atoms.info.get(key, np.nan) for atoms in atoms_list]
-                )
-                if np.any(np.isnan(data)):
+                values = (atoms.info.get(key, np.nan) for atoms in atoms_list)
+                if isinstance(first_atoms.info.get(key), (float, np.floating)):
+                    # scalar floats are gathered straight into a single array.
+                    data = np.fromiter(values, dtype=np.float64, count=n_frames)
+                    missing = np.isnan(data).any()
+                else:
+                    values = list(values)
+                    data = np.array(values)
+                    if data.dtype.kind in "fc":
+                        missing = np.isnan(data).any()
+                    else:
+                        # NaN cannot be found in non-float data once stored.
+                        missing = any(value is np.nan for value in values)
+                        data = convert_dtype(data, np.float64)
+                if missing:
                     warnings.warn(
                         f"Some frames missing '{key}' info.", stacklevel=2
                     )
                 h5file.create_dataset(
-                    f"info/{key}", data=data, compression=compression
+                    f"info/{key}",
+                    data=data,
+                    chunks=frame_chunks(data.shape, data.itemsize, chunks),
+                    **filters,
                 )
 
-    def read(self, filename: Path | str) -> list[ase.Atoms]:
+    def read(
+        self,
+        filename: Path | str,
+        *,
+        lazy: bool = False,
+        threaded: bool = True,
+        mmap: bool = False,
+    ) -> list[ase.Atoms] | Iterator[ase.Atoms]:
         """
         Read ASE Atoms objects from an HDF5 file.
 
@@ -146,65 +271,90 @@ class ASEH5Trajectory:
         ----------
         filename
             Path to the HDF5 file to read from.
+        lazy
+            If True, return an iterator that reads the file one chunk of
+            frames at a time (see :meth:`iter_read`).
+        threaded
+            If True, decompress the chunks of gzip-compressed per-frame
+            datasets on a pool of threads. Ignored if lazy is True.
+        mmap
+            If True, memory-map contiguous, uncompressed datasets (written with
+            compression=None and chunks=None) instead of reading them, such
+            that only the pages that are used are loaded. The frames then
+            depend on the file, which must not be overwritten or truncated
+            while they are in use.
 
         Returns
         -------
         atoms_list
-            List of ASE Atoms objects read from the file.
+            List of ASE Atoms objects read from the file, or an iterator over
+            them if lazy is True.
         """
 
-        filename = Path(filename)
-
-        atoms_list = []
-        with h5py.File(filename, "r") as h5file:
-            immutable_data = {
-                key: decode_bytes(np.array(val))
-                for key, val in h5file["immutable"].items()
-            }
-            mutable_data = {
-                key: decode_bytes(np.array(val))
-                for key, val in h5file["mutable"].items()
-            }
-
-            info_data = {}
-            if "info" in h5file:
-                info_data = {
-                    key: decode_bytes(np.array(val))
-                    for key, val in h5file["info"].items()
-                }
-
-            num_frames = next(iter(mutable_data.values())).shape[0]
-
-            for i in range(num_frames):
-                arrays = {
-                    key: val[i]
-                    for key, val in mutable_data.items()
-                    if key != "cell"
-                }
-                arrays.update(immutable_data)
-
-                cell = (
-                    mutable_data.get("cell")[i]
-                    if "cell" in mutable_data
-                    else immutable_data.get("cell")
-                )
+        if lazy:
+            return self.iter_read(filename, mmap=mmap)
 
-                cell = cell if cell.sum() != 0 else None
+        pool = (
+            ThreadPoolExecutor(min(8, os.cpu_count() or 1))
+            if threaded
+            else nullcontext()
+        )
 
-                atoms = ase.Atoms(positions=arrays.pop("positions"), cell=cell)
+        with self._open(filename, "r") as h5file, pool as executor:
+            num_frames = len(next(iter(h5file["mutable"].values())))
+            atoms_list = [None] * num_frames
+            frames = iter_frames(h5file, executor=executor, mmap=mmap)
+            for i, atoms in enumerate(frames):
+                atoms_list[i] = atoms
 
-                if cell is not None:
-                    atoms.pbc = True
+        return atoms_list
 
-                for key, val in arrays.items():
-                    atoms.arrays[key] = val
+    def iter_read(
+        self, filename: Path | str, mmap: bool = False
+    ) -> Iterator[ase.Atoms]:
+        """
+        Lazily read ASE Atoms objects from an HDF5 file.
 
-                for key, val in info_data.items():
-                    atoms.info[key] = val[i]
+        The per-frame datasets are read in blocks of as many frames as the
+        smallest chunk holds, such that only about one chunk per dataset is
+        held in memory. The file stays open until the iterator is exhausted.
 
-                atoms_list.append(atoms)
+        Parameters
+        ----------
+        filename
+            Path to the HDF5 file to read from.
+        mmap
+            If True, memory-map contiguous, uncompressed datasets instead of
+            reading them (see :meth:`read`).
 
-        return atoms_list
+        Yields
+        ------
+        atoms
+            ASE Atoms objects read from the file.
+        """
+
+        with self._open(filename, "r") as h5file:
+            # the smallest chunk belongs to the largest frames, e.g. the
+            # positions rather than the cell, and bounds the memory per block.
+            block_size = min(
+                (
+                    dset.chunks
+                    or frame_chunks(dset.shape, dset.dtype.itemsize)
+                    or (1,)
+                )[0]
+                for dset in h5file["mutable"].values()
+            )
+            yield from iter_frames(h5file, block_size, mmap=mmap)
+
+    def _open(self, filename: Path | str, mode: str) -> h5py.File:
+        """Open an HDF5 file with the configured chunk cache."""
+
+        return h5py.File(
+            filename,
+            mode,
+            rdcc_nbytes=self.chunk_cache_size,
+            rdcc_nslots=CHUNK_CACHE_SLOTS,
+        )
 
     def __repr__(self) -> str:
         """A string representation of the ASEH5Trajectory object."""
@@ -223,21 +373,16 @@ class ASEH5Trajectory:
 
         ensemble = "NPT" if "cell" in self.mutable else "NVT"
 
-        repr_lines = [
+        parts = [
+            f"{indent}ensemble={ensemble}",
             f"{indent}immutable_keys=(\n{immutable_keys}\n{indent})",
             f"{indent}mutable_keys=(\n{mutable_keys}\n{indent})",
         ]
 
         if self.info_keys:
-            repr_lines.append(
-                f"info_keys=(\n{info_keys}\n{indent})",
-            )
+            parts.append(f"{indent}info_keys=(\n{info_keys}\n{indent})")
 
-        return (
-            f"ASEH5Trajectory(\n{indent}ensemble={ensemble},\n"
-            + ",\n".join(repr_lines)
-            + "\n)"
-        )
+        return "ASEH5Trajectory(\n" + ",\n".join(parts) + "\n)"
 
 
 ########## HELPER FUNCTIONS ##########
@@ -245,7 +390,7 @@ class ASEH5Trajectory:
 
 def validate_keys(
     immutable: list[str] | None, mutable: list[str] | None
-) -> tuple[set[str], set[str]]:
+) -> tuple[tuple[str, ...], tuple[str, ...]]:
     """
     Ensure there are no repeated keys in both immutable and mutable. If
     'numbers' appears in mutable, remove it from immutable. If 'positions'
@@ -260,38 +405,241 @@ def validate_keys(
 
     Returns
     -------
-    Validated sets of immutable and mutable properties.
+    Validated immutable and mutable properties, without duplicates and in the
+    order they were first given.
     """
 
-    immutable_set = set(immutable or [])
-    mutable_set = set(mutable or [])
+    # dicts give hashed lookups while keeping the keys in order.
+    immutable_keys = dict.fromkeys(immutable or ())
+    mutable_keys = dict.fromkeys(mutable or ())
 
     # Ensure 'numbers' and 'positions' are correctly placed.
-    if "numbers" in mutable_set:
-        immutable_set.discard("numbers")
+    if "numbers" in mutable_keys:
+        immutable_keys.pop("numbers", None)
 
-    if "positions" in immutable_set:
-        mutable_set.discard("positions")
+    if "positions" in immutable_keys:
+        mutable_keys.pop("positions", None)
 
     # Now remove common keys
-    common_keys = immutable_set & mutable_set
-    if common_keys:
+    conflicts = [key for key in immutable_keys if key in mutable_keys]
+    if conflicts:
         raise ValueError(
             "Conflicting keys found in both immutable and mutable: "
-            + ", ".join([f"'{x}'" for x in common_keys])
+            + ", ".join(f"'{x}'" for x in conflicts)
         )
 
-    return immutable_set, mutable_set
+    return tuple(immutable_keys), tuple(mutable_keys)
 
 
-def check_immutable_consistency(atoms_list, key, data) -> None:
+def iter_frames(
+    h5file: h5py.File,
+    block_size: int | None = None,
+    executor: Executor | None = None,
+    mmap: bool = False,
+) -> Iterator[ase.Atoms]:
+    """
+    Iterate over the frames stored in an open HDF5 file.
+
+    Immutable data is read once and shared between all frames, while the
+    per-frame datasets are read in blocks of frames.
+
+    Parameters
+    ----------
+    h5file
+        The open HDF5 file.
+    block_size
+        Number of frames to read per block. If None, read all frames at once.
+    executor
+        Executor used to decompress the chunks of the per-frame datasets.
+    mmap
+        Whether to memory-map contiguous, uncompressed datasets.
+
+    Yields
+    ------
+    atoms
+        ASE Atoms objects read from the file.
+    """
+
+    immutable_data = {
+        key: read_dataset(val, mmap=mmap)
+        for key, val in h5file["immutable"].items()
+    }
+    mutable = dict(h5file["mutable"].items())
+    info = dict(h5file["info"].items()) if "info" in h5file else {}
+
+    num_frames = next(iter(mutable.values())).shape[0]
+    block_size = block_size or num_frames
+
+    # each frame is cloned from a template holding the immutable data, which
+    # is much cheaper than constructing a new Atoms object per frame.
+    cell = immutable_data.pop("cell", None)
+    cell = cell if cell is not None and cell.sum() != 0 else None
+    positions = immutable_data.pop("positions", None)
+    template = ase.Atoms(
+        positions=(
+            positions
+            if positions is not None
+            else np.zeros(mutable["positions"].shape[1:])
+        ),
+        cell=cell,
+        pbc=cell is not None,
+    )
+    template.arrays.update(immutable_data)
+    copied = container_keys(template)
+
+    for start in range(0, num_frames, block_size):
+        frames = slice(start, min(start + block_size, num_frames))
+        mutable_data = {
+            key: read_dataset(val, frames, executor, mmap)
+            for key, val in mutable.items()
+        }
+
+        # scalar info is converted to Python objects once per block, which
+        # also restores the types the values usually had before writing.
+        info_data = {}
+        for key, val in info.items():
+            data = read_dataset(val, frames, executor, mmap)
+            info_data[key] = data.tolist() if data.ndim == 1 else data
+
+        cells = mutable_data.pop("cell", None)
+        if cells is not None:
+            has_cell = (cells.sum(axis=(1, 2)) != 0).tolist()
+        if "positions" in mutable_data:
+            mutable_data["positions"] = mutable_data["positions"].astype(
+                float, copy=False
+            )
+
+        mutable_items = list(mutable_data.items())
+        info_items = list(info_data.items())
+        for i in range(frames.stop - frames.start):
+            atoms = clone_atoms(template, copied)
+
+            arrays = atoms.arrays
+            for key, val in mutable_items:
+                arrays[key] = val[i]
+
+            if positions is not None:
+                arrays["positions"] = positions.astype(float)
+
+            if cells is not None:
+                atoms.cell.array[:] = cells[i] if has_cell[i] else 0.0
+                atoms.pbc[:] = has_cell[i]
+
+            atoms_info = atoms.info
+            for key, val in info_items:
+                atoms_info[key] = val[i]
+
+            yield atoms
+
+
+def clone_atoms(
+    template: ase.Atoms, copied: list[str] | None = None
+) -> ase.Atoms:
+    """
+    Copy an Atoms object without calling Atoms.__init__, which would
+    validate and convert all of its arguments again. Containers such as the
+    arrays dict, info dict and cell are copied, while the arrays they hold
+    are shared with the template.
+
+    Parameters
+    ----------
+    template
+        The Atoms object to copy.
+    copied
+        Names of the attributes of the template holding containers, as given
+        by :func:`container_keys`. If None, they are found from the template.
+
+    Returns
+    -------
+    The copied Atoms object.
+    """
+
+    state = vars(template).copy()
+    for key in container_keys(template) if copied is None else copied:
+        state[key] = state[key].copy()
+
+    atoms = object.__new__(type(template))
+    vars(atoms).update(state)
+    return atoms
+
+
+def container_keys(atoms: ase.Atoms) -> list[str]:
+    """Get the attributes of an Atoms object that are copied when cloning."""
+
+    return [
+        key for key, val in vars(atoms).items() if isinstance(val, CONTAINERS)
+    ]
+
+
+def get_property(atoms: ase.Atoms, key: str) -> np.ndarray | None:
+    """
+    Get a property from the arrays of an Atoms object, falling back to its
+    info. The info is only searched if the key is not in the arrays.
+
+    Parameters
+    ----------
+    atoms
+        The Atoms object.
+    key
+        The property to get.
+
+    Returns
+    -------
+    The property, or None if it is missing.
+    """
+
+    data = atoms.arrays.get(key)
+    if data is None:
+        data = atoms.info.get(key)
+    return data
+
+
+def cells_equal(cell: np.ndarray, reference: np.ndarray) -> bool:
+    """
+    Check if a cell, or a stack of cells, matches a reference cell. Cells are
+    usually exact copies when they do not change between frames, so a cheap
+    exact comparison is tried before the comparison within floating point
+    tolerance.
+    """
+
+    return (cell == reference).all() or np.allclose(cell, reference)
+
+
+def check_immutable_consistency(
+    atoms_list, key, data, block_size: int | None = None
+) -> None:
     """
     Check if an immutable property changes between frames.
+
+    The frames are compared against the first frame in blocks, with a single
+    vectorised comparison per block, stopping at the first change. Blocks
+    default to about CHUNK_BYTES of data, or a single frame for large data.
+    Frames sharing the first frame's data object are skipped without
+    comparison.
     """
 
-    for atoms in atoms_list[1:]:
-        new_data = atoms.arrays.get(key, atoms.info.get(key))
-        if new_data is not None and not np.array_equal(data, new_data):
+    reference = data
+    data = np.asarray(data)
+    block_size = block_size or max(1, CHUNK_BYTES // max(data.nbytes, 1))
+    for start in range(1, len(atoms_list), block_size):
+        block = [
+            new_data
+            for new_data in (
+                get_property(atoms, key)
+                for atoms in atoms_list[start : start + block_size]
+            )
+            if new_data is not None and new_data is not reference
+        ]
+        if not block:
+            continue
+
+        try:
+            stacked = np.stack(block)
+            changed = stacked.shape[1:] != data.shape or (stacked != data).any()
+        except ValueError:  # frames with differently shaped data.
+            changed = True
+
+        if changed:
             warnings.warn(
                 f"Immutable property '{key}' changes between frames.",
                 stacklevel=2,
@@ -299,6 +647,119 @@ def check_immutable_consistency(atoms_list, key, data) -> None:
             break
 
 
+def frame_chunks(
+    shape: tuple[int, ...], itemsize: int, chunks: int | str | None = "auto"
+) -> tuple[int, ...] | None:
+    """
+    Get the chunk shape for a per-frame dataset, where the first axis indexes
+    the frames. Chunks only ever split the frame axis, such that reading a
+    single frame touches a single chunk.
+
+    Parameters
+    ----------
+    shape
+        Shape of the dataset.
+    itemsize
+        Size in bytes of a single element of the dataset.
+    chunks
+        Number of frames per chunk. If "auto", target chunks of CHUNK_BYTES.
+        If None, return None and let h5py decide.
+
+    Returns
+    -------
+    The chunk shape, or None.
+    """
+
+    if chunks is None or 0 in shape:
+        return None
+
+    if chunks == "auto":
+        frame_bytes = itemsize * int(np.prod(shape[1:]))
+        chunks = CHUNK_BYTES // frame_bytes
+        if len(shape) == 1:
+            chunks = min(chunks, 4096)
+
+    return (max(1, min(int(chunks), shape[0])),) + tuple(shape[1:])
+
+
+class FrameBuffer:
+    """
+    Collect per-frame data in memory and write it to a per-frame dataset one
+    chunk at a time, such that each write to the file fills whole chunks.
+    """
+
+    def __init__(self, dset: h5py.Dataset) -> None:
+        """
+        Parameters
+        ----------
+        dset
+            The dataset to write to, where the first axis indexes the frames.
+        """
+
+        n_frames = dset.chunks[0] if dset.chunks else dset.shape[0]
+        self.dset = dset
+        self.buffer = np.empty((n_frames,) + dset.shape[1:], dtype=dset.dtype)
+        self.start = 0
+        self.count = 0
+
+        # full chunks of unfiltered datasets are written directly to the
+        # file, bypassing HDF5's selection and type conversion. Filtered
+        # chunks go through HDF5, whose filters are faster than zlib here.
+        self.direct = (
+            direct_chunks(dset)
+            and dset.compression is None
+            and not dset.shuffle
+        )
+
+    def append(self, data: np.ndarray | float) -> None:
+        """
+        Add the data for the next frame, writing the buffer when full.
+
+        Raises
+        ------
+        ValueError
+            If the data does not have the shape of a frame of the dataset, or
+            cannot be stored in its type without changing kind (e.g. floats
+            in an integer dataset) or truncating strings.
+        """
+
+        data = np.asarray(data)
+        dtype = self.buffer.dtype
+        if data.shape != self.buffer.shape[1:]:
+            raise ValueError(
+                f"Frame of shape {data.shape} does not match the shape "
+                f"{self.buffer.shape[1:]} of dataset '{self.dset.name}'."
+            )
+        if not np.can_cast(data.dtype, dtype, "same_kind") or (
+            data.dtype.kind == "S" and data.itemsize > dtype.itemsize
+        ):
+            raise ValueError(
+                f"Frame of type {data.dtype} cannot be stored in dataset "
+                f"'{self.dset.name}' of type {dtype}."
+            )
+
+        self.buffer[self.count] = data
+        self.count += 1
+        if self.count == len(self.buffer):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write all buffered frames to the dataset."""
+
+        if not self.count:
+            return
+
+        if self.direct and self.count == len(self.buffer):
+            offset = (self.start,) + (0,) * (self.buffer.ndim - 1)
+            self.dset.id.write_direct_chunk(offset, self.buffer)
+        else:
+            stop = self.start + self.count
+            self.dset[self.start : stop] = self.buffer[: self.count]
+
+        self.start += self.count
+        self.count = 0
+
+
 def convert_dtype(
     data: np.ndarray | float, float_dtype: np.dtype
 ) -> np.ndarray | float:
@@ -329,11 +790,188 @@ def convert_dtype(
         else:
             return data
     elif isinstance(data, (float, np.floating)):
-        return float_dtype(data)
+        return np.dtype(float_dtype).type(data)
     else:
         return data
 
 
+def read_dataset(
+    dset: h5py.Dataset,
+    frames: slice | None = None,
+    executor: Executor | None = None,
+    mmap: bool = False,
+) -> np.ndarray:
+    """
+    Read a dataset directly into a newly allocated array, bypassing h5py's
+    intermediate buffer, and decode any byte strings.
+
+    Parameters
+    ----------
+    dset
+        The dataset to read.
+    frames
+        Slice along the first axis to read. If None, read the whole dataset.
+    executor
+        If given, and the dataset is compressed and supports direct chunk
+        access, the raw chunks are read and then decompressed in parallel on
+        the executor.
+    mmap
+        If True, and the dataset can be memory-mapped (see
+        :func:`map_dataset`), return a copy-on-write view of the file.
+
+    Returns
+    -------
+    The dataset contents.
+    """
+
+    mapped = map_dataset(dset) if mmap else None
+    if mapped is not None:
+        return decode_bytes(mapped if frames is None else mapped[frames])
+
+    shape = dset.shape
+    start = 0
+    if frames is not None:
+        start, stop, _ = frames.indices(shape[0])
+        shape = (stop - start,) + shape[1:]
+
+    data = np.empty(shape, dtype=dset.dtype)
+    if (
+        data.size
+        and executor is not None
+        and dset.compression is not None
+        and direct_chunks(dset)
+    ):
+        read_chunks(dset, data, start, executor)
+    elif data.size:
+        dset.read_direct(data, source_sel=frames)
+
+    return decode_bytes(data)
+
+
+def map_dataset(dset: h5py.Dataset) -> np.ndarray | None:
+    """
+    Memory-map a contiguous, unfiltered dataset of fixed-size elements stored
+    in a regular file.
+
+    The map is copy-on-write, such that arrays taken from it can be modified
+    without changing the file.
+
+    Parameters
+    ----------
+    dset
+        The dataset to map.
+
+    Returns
+    -------
+    The mapped dataset, or None if the dataset cannot be mapped.
+    """
+
+    if (
+        dset.chunks is not None
+        or dset.ndim == 0
+        or dset.dtype.hasobject
+        or dset.file.driver != "sec2"
+    ):
+        return None
+
+    offset = dset.id.get_offset()
+    if offset is None:  # no storage allocated, e.g. the dataset is empty.
+        return None
+
+    mapped = np.memmap(
+        dset.file.filename,
+        dtype=dset.dtype,
+        mode="c",
+        offset=offset,
+        shape=dset.shape,
+    )
+    return np.asarray(mapped)
+
+
+def read_chunks(
+    dset: h5py.Dataset, out: np.ndarray, start: int, executor: Executor
+) -> None:
+    """
+    Fill an array with consecutive frames of a dataset by reading the raw
+    chunks of the dataset and decompressing them in parallel. Unlike HDF5's
+    own filter pipeline, zlib releases the GIL while decompressing.
+
+    Parameters
+    ----------
+    dset
+        The dataset to read, whose chunks support direct access.
+    out
+        The array to fill.
+    start
+        The index of the first frame to read.
+    executor
+        Executor used to decompress the chunks.
+    """
+
+    n_frames = dset.chunks[0]
+    stop = start + len(out)
+    offsets = range(start - start % n_frames, stop, n_frames)
+    zero = (0,) * (dset.ndim - 1)
+    raw_chunks = [dset.id.read_direct_chunk((i,) + zero) for i in offsets]
+
+    # a set bit in the filter mask means HDF5 skipped an optional filter.
+    if any(filter_mask for filter_mask, _ in raw_chunks):
+        dset.read_direct(out, source_sel=np.s_[start:stop])
+        return
+
+    decode = functools.partial(
+        decode_chunk, dtype=dset.dtype, shuffle=dset.shuffle
+    )
+    for offset, chunk in zip(
+        offsets, executor.map(decode, (chunk for _, chunk in raw_chunks))
+    ):
+        chunk = chunk.reshape(dset.chunks)
+        lo, hi = max(offset, start), min(offset + n_frames, stop)
+        out[lo - start : hi - start] = chunk[lo - offset : hi - offset]
+
+
+def decode_chunk(chunk: bytes, dtype: np.dtype, shuffle: bool) -> np.ndarray:
+    """
+    Decompress a gzip-compressed chunk read from a dataset, undoing the HDF5
+    shuffle filter if needed, and return the flattened chunk data.
+
+    Parameters
+    ----------
+    chunk
+        The raw chunk.
+    dtype
+        The type of the chunk data.
+    shuffle
+        Whether the bytes of the chunk were shuffled.
+
+    Returns
+    -------
+    The decoded chunk.
+    """
+
+    data = np.frombuffer(zlib.decompress(chunk), dtype=np.uint8)
+    if shuffle:
+        data = np.ascontiguousarray(data.reshape(dtype.itemsize, -1).T)
+    return data.view(dtype).reshape(-1)
+
+
+def direct_chunks(dset: h5py.Dataset) -> bool:
+    """
+    Check whether the chunks of a per-frame dataset can be accessed as raw
+    chunks, i.e. whether each chunk holds whole frames of fixed-size data and
+    the only filters are gzip and shuffle, if any.
+    """
+
+    return (
+        dset.chunks is not None
+        and dset.chunks[1:] == dset.shape[1:]
+        and not dset.dtype.hasobject
+        and dset.compression in (None, "gzip")
+        and not dset.fletcher32
+        and dset.scaleoffset is None
+    )
+
+
 def decode_bytes(data: np.ndarray) -> np.ndarray:
     """
     Decode a NumPy byte string array (dtype='S') to a Unicode string array
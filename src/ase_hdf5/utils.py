@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import os
 from pathlib import Path
 
+_UNITS = ("B", "KB", "MB", "GB", "TB")
+_DIVISORS = tuple(1024**i for i in range(len(_UNITS)))
+
 
 def human_readable_size(
     size_bytes: int, units: str | None = None, return_float: bool = False
@@ -23,33 +27,35 @@ def human_readable_size(
     The size converted to the requested or most appropriate unit.
     """
 
-    unit_list = ["B", "KB", "MB", "GB"]
-    size_bytes = float(size_bytes)  # ensure float precision
-
-    # if a specific unit is requested, convert directly to that unit
-    if units and units in unit_list:
-        unit_index = unit_list.index(units)
-        size_bytes /= 1024**unit_index
-        return size_bytes if return_float else f"{size_bytes:.2f} {units}"
-
-    # otherwise, find the appropriate unit dynamically
-    for unit in unit_list:
-        if size_bytes < 1024:
-            return size_bytes if return_float else f"{size_bytes:.2f} {unit}"
-        size_bytes /= 1024
+    # use the requested unit, or otherwise the largest unit that keeps the
+    # size at or above one, found directly from the bit length of the size.
+    if units in _UNITS:
+        unit_index = _UNITS.index(units)
+    elif size_bytes < 1024:
+        unit_index = 0
+    else:
+        unit_index = min(
+            (int(size_bytes).bit_length() - 1) // 10, len(_UNITS) - 1
+        )
 
-    # if it's beyond TB, return TB representation
-    return size_bytes if return_float else f"{size_bytes:.2f} TB"
+    size = size_bytes / _DIVISORS[unit_index]
+    return size if return_float else f"{size:.2f} {_UNITS[unit_index]}"
 
 
-def _get_file_size(file_path: Path) -> int:
+def _get_file_size(file_path: Path | str) -> int:
     """Get the size of a file in bytes."""
 
-    return file_path.stat().st_size
+    return os.stat(file_path).st_size
 
 
-def get_file_size(file_path: Path | str, **kwargs) -> str:
-    """Get the size of a file in a human-readable format."""
+def get_file_size(
+    file_path: Path | str, size_bytes: int | None = None, **kwargs
+) -> str:
+    """
+    Get the size of a file in a human-readable format. If the size in bytes
+    is already known, it can be passed to avoid querying the file system.
+    """
 
-    size_bytes = _get_file_size(Path(file_path))
+    if size_bytes is None:
+        size_bytes = _get_file_size(file_path)
     return human_readable_size(size_bytes, **kwargs)
@@ -1,36 +1,53 @@
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
 import ase
+import h5py
 import numpy as np
 import pytest
 
+from ase_hdf5 import core
 from ase_hdf5.core import (
+    CHUNK_CACHE_SLOTS,
     ASEH5Trajectory,
+    FrameBuffer,
+    cells_equal,
+    check_immutable_consistency,
     convert_dtype,
     decode_bytes,
+    frame_chunks,
+    get_property,
+    read_dataset,
     validate_keys,
 )
 
 
+@pytest.fixture
+def rng():
+    """Return a seeded random number generator."""
+
+    return np.random.default_rng(0xA5E)
+
+
 @pytest.fixture(params=["immutable_cell", "mutable_cell"])
-def sample_atoms_list(request):
+def sample_atoms_list(request, rng):
     """
     Return a list of 10 random ASE Atoms objects, with either immutable (NVT) or
     mutable (NPT) cell.
     """
 
-    cell = np.random.rand(3, 3)
-    numbers = np.random.randint(1, 10, size=10)
-    framework = np.random.randint(1, 10, size=10)
-    mol_id = np.random.randint(1, 10, size=10)
+    cell = rng.random((3, 3))
+    numbers = rng.integers(1, 10, size=10)
+    framework = rng.integers(1, 10, size=10)
+    mol_id = rng.integers(1, 10, size=10)
 
     atoms_list = []
     for _ in range(10):
         atoms = ase.Atoms(
             numbers=numbers,
-            positions=np.random.rand(10, 3),
+            positions=rng.random((10, 3)),
             cell=(
-                np.random.rand(3, 3)
-                if request.param == "mutable_cell"
-                else cell
+                rng.random((3, 3)) if request.param == "mutable_cell" else cell
             ),
         )
         atoms.arrays["framework"] = framework
@@ -40,7 +57,8 @@ def sample_atoms_list(request):
     return atoms_list
 
 
-def test_write_and_read(tmp_path, sample_atoms_list):
+@pytest.mark.parametrize("threaded", [True, False])
+def test_write_and_read(tmp_path, sample_atoms_list, threaded):
     """Tests writing/reading ASE Atoms objects to and from an HDF5 file."""
 
     test_file = tmp_path / "test.h5"
@@ -51,20 +69,287 @@ def test_write_and_read(tmp_path, sample_atoms_list):
     )
 
     traj.write(sample_atoms_list, test_file)
-    read_atoms_list = traj.read(test_file)
+    read_atoms_list = traj.read(test_file, threaded=threaded)
+
+    assert len(read_atoms_list) == len(sample_atoms_list)
+    for orig, read in zip(sample_atoms_list, read_atoms_list):
+        assert np.array_equal(orig.numbers, read.numbers)
+        np.testing.assert_allclose(orig.positions, read.positions)
+        np.testing.assert_allclose(orig.cell.array, read.cell.array)
+
+
+def test_write_layout(tmp_path, sample_atoms_list):
+    """Tests each property is stored as one dataset covering all frames."""
+
+    test_file = tmp_path / "test.h5"
+    for i, atoms in enumerate(sample_atoms_list):
+        atoms.info["energy"] = float(i)
+
+    traj = ASEH5Trajectory(mutable=["mol-id"], info_keys=["energy"])
+    traj.write(sample_atoms_list, test_file)
+
+    with h5py.File(test_file, "r") as h5file:
+        assert set(h5file["mutable"]) <= {"positions", "mol-id", "cell"}
+        assert h5file["mutable/positions"].shape == (10, 10, 3)
+        assert h5file["mutable/mol-id"].shape == (10, 10)
+        assert h5file["info/energy"].shape == (10,)
+        assert h5file["info/energy"].dtype == np.float64
+
+
+def test_write_cell_layout(tmp_path, sample_atoms_list):
+    """Tests the cell is stored once, or once per frame if it changes."""
+
+    test_file = tmp_path / "test.h5"
+
+    traj = ASEH5Trajectory()
+    traj.write(sample_atoms_list, test_file)
+
+    cells = np.array([atoms.cell.array for atoms in sample_atoms_list])
+    with h5py.File(test_file, "r") as h5file:
+        if (cells == cells[0]).all():
+            assert "cell" not in h5file["mutable"]
+            np.testing.assert_allclose(
+                h5file["immutable/cell"][()], cells[0], rtol=1e-6
+            )
+        else:
+            assert "cell" not in h5file["immutable"]
+            np.testing.assert_allclose(
+                h5file["mutable/cell"][()], cells, rtol=1e-6
+            )
+
+
+@pytest.mark.parametrize("chunks", ["auto", 3, None])
+def test_write_chunks(tmp_path, sample_atoms_list, chunks):
+    """Tests per-frame datasets are chunked along the frame axis."""
+
+    test_file = tmp_path / "test.h5"
+
+    traj = ASEH5Trajectory()
+    traj.write(sample_atoms_list, test_file, chunks=chunks)
+
+    with h5py.File(test_file, "r") as h5file:
+        positions = h5file["mutable/positions"]
+        if chunks is not None:
+            expected = 10 if chunks == "auto" else chunks
+            assert positions.chunks == (expected, 10, 3)
+
+    for orig, read in zip(sample_atoms_list, traj.read(test_file)):
+        np.testing.assert_allclose(orig.positions, read.positions)
+
+
+@pytest.mark.parametrize(
+    "compression, shuffle, expected",
+    [("gzip", True, True), ("gzip", False, False), (None, True, False)],
+)
+def test_write_shuffle(
+    tmp_path, sample_atoms_list, compression, shuffle, expected
+):
+    """Tests the shuffle filter is only applied to compressed datasets."""
+
+    test_file = tmp_path / "test.h5"
+
+    traj = ASEH5Trajectory()
+    traj.write(
+        sample_atoms_list, test_file, compression=compression, shuffle=shuffle
+    )
+
+    with h5py.File(test_file, "r") as h5file:
+        assert h5file["mutable/positions"].shuffle == expected
+        assert h5file["immutable/numbers"].shuffle == expected
+
+    for orig, read in zip(sample_atoms_list, traj.read(test_file)):
+        np.testing.assert_allclose(orig.positions, read.positions)
+
+
+@pytest.mark.parametrize(
+    "compression, compression_opts", [("gzip", 1), ("gzip", 9), ("lzf", None)]
+)
+def test_write_compression(
+    tmp_path, sample_atoms_list, compression, compression_opts
+):
+    """Tests writing with different compression algorithms and levels."""
+
+    test_file = tmp_path / "test.h5"
+
+    traj = ASEH5Trajectory()
+    traj.write(
+        sample_atoms_list,
+        test_file,
+        compression=compression,
+        compression_opts=compression_opts,
+    )
+
+    with h5py.File(test_file, "r") as h5file:
+        positions = h5file["mutable/positions"]
+        assert positions.compression == compression
+        assert positions.compression_opts == compression_opts
+
+    for orig, read in zip(sample_atoms_list, traj.read(test_file)):
+        np.testing.assert_allclose(orig.positions, read.positions, rtol=1e-6)
+
 
+def test_dtype_overrides(tmp_path, sample_atoms_list):
+    """Tests per-property float types override the default float type."""
+
+    test_file = tmp_path / "test.h5"
+
+    traj = ASEH5Trajectory(dtype_overrides={"positions": "float64"})
+    traj.write(sample_atoms_list, test_file)
+
+    with h5py.File(test_file, "r") as h5file:
+        assert h5file["mutable/positions"].dtype == np.float64
+        group = "mutable" if "cell" in h5file["mutable"] else "immutable"
+        assert h5file[f"{group}/cell"].dtype == np.float32
+
+    for orig, read in zip(sample_atoms_list, traj.read(test_file)):
+        assert np.array_equal(orig.positions, read.positions)
+
+
+def test_chunk_cache_size(tmp_path):
+    """Tests files are opened with the configured chunk cache size."""
+
+    traj = ASEH5Trajectory(chunk_cache_size=2 * 1024**2)
+    with traj._open(tmp_path / "test.h5", "w") as h5file:
+        cache = h5file.id.get_access_plist().get_cache()
+        assert cache[1] == CHUNK_CACHE_SLOTS
+        assert cache[2] == 2 * 1024**2
+
+
+def test_lazy_read(tmp_path, sample_atoms_list):
+    """Tests lazily reading a file one chunk of frames at a time."""
+
+    test_file = tmp_path / "test.h5"
+    for i, atoms in enumerate(sample_atoms_list):
+        atoms.info["energy"] = float(i)
+
+    traj = ASEH5Trajectory(info_keys=["energy"])
+    traj.write(sample_atoms_list, test_file, chunks=3)
+
+    read_atoms = traj.read(test_file, lazy=True)
+    assert not isinstance(read_atoms, list)
+
+    read_atoms_list = list(read_atoms)
     assert len(read_atoms_list) == len(sample_atoms_list)
+    for i, (orig, read) in enumerate(zip(sample_atoms_list, read_atoms_list)):
+        np.testing.assert_allclose(orig.positions, read.positions)
+        np.testing.assert_allclose(orig.cell.array, read.cell.array)
+        assert read.info["energy"] == float(i)
+
+
+def test_lazy_read_block_size(tmp_path, monkeypatch, rng):
+    """Tests lazy reads use the smallest chunk when chunk lengths differ."""
+
+    test_file = tmp_path / "test.h5"
+    atoms_list = [
+        ase.Atoms(
+            "H1000", positions=rng.random((1000, 3)), cell=rng.random((3, 3))
+        )
+        for _ in range(100)
+    ]
+
+    traj = ASEH5Trajectory()
+    traj.write(atoms_list, test_file)
+
+    with h5py.File(test_file, "r") as h5file:
+        assert h5file["mutable/positions"].chunks == (87, 1000, 3)
+        assert h5file["mutable/cell"].chunks == (100, 3, 3)
+
+    block_sizes = []
+    iter_frames = core.iter_frames
+
+    def record_block_size(h5file, block_size=None, **kwargs):
+        block_sizes.append(block_size)
+        return iter_frames(h5file, block_size, **kwargs)
+
+    monkeypatch.setattr(core, "iter_frames", record_block_size)
+    read_atoms_list = list(traj.read(test_file, lazy=True))
+
+    assert block_sizes == [87]
+    for orig, read in zip(atoms_list, read_atoms_list):
+        np.testing.assert_allclose(orig.positions, read.positions, rtol=1e-6)
+        np.testing.assert_allclose(orig.cell.array, read.cell.array, rtol=1e-6)
+
+
+def test_read_frames_independent(tmp_path, sample_atoms_list):
+    """Tests frames read from a file can be modified independently."""
+
+    test_file = tmp_path / "test.h5"
+
+    traj = ASEH5Trajectory()
+    traj.write(sample_atoms_list, test_file)
+    first, second = traj.read(test_file)[:2]
+
+    assert first.positions.dtype == np.float64
+    expected = second.positions.copy(), second.cell.array.copy()
+
+    first.positions += 1.0
+    first.cell[0, 0] += 1.0
+    first.pbc = False
+    first.info["energy"] = 1.0
+
+    np.testing.assert_array_equal(second.positions, expected[0])
+    np.testing.assert_array_equal(second.cell.array, expected[1])
+    assert second.pbc.all()
+    assert "energy" not in second.info
+
+
+def test_read_mutable_cell_without_cell(tmp_path, rng):
+    """Tests frames without a cell are not periodic when the cell changes."""
+
+    test_file = tmp_path / "test.h5"
+    atoms_list = [
+        ase.Atoms("H2", positions=rng.random((2, 3)), cell=cell, pbc=True)
+        for cell in [np.eye(3), np.zeros((3, 3)), 2 * np.eye(3)]
+    ]
+
+    traj = ASEH5Trajectory()
+    traj.write(atoms_list, test_file)
+    read_atoms_list = traj.read(test_file)
+
+    assert [atoms.pbc.all() for atoms in read_atoms_list] == [1, 0, 1]
+    for orig, read in zip(atoms_list, read_atoms_list):
+        np.testing.assert_allclose(orig.cell.array, read.cell.array)
+
+
+def test_immutable_positions(tmp_path, sample_atoms_list):
+    """Tests writing/reading positions as an immutable property."""
+
+    test_file = tmp_path / "test.h5"
+    for atoms in sample_atoms_list:
+        atoms.positions = sample_atoms_list[0].positions
+
+    traj = ASEH5Trajectory(immutable=["positions"], mutable=["mol-id"])
+    traj.write(sample_atoms_list, test_file)
+
+    read_atoms_list = traj.read(test_file)
     for orig, read in zip(sample_atoms_list, read_atoms_list):
-        np.testing.assert_array_equal(orig.numbers, read.numbers)
         np.testing.assert_allclose(orig.positions, read.positions)
         np.testing.assert_allclose(orig.cell.array, read.cell.array)
 
+    read_atoms_list[0].positions += 1.0
+    np.testing.assert_allclose(
+        sample_atoms_list[1].positions, read_atoms_list[1].positions
+    )
+
+
+def test_read_arrays(tmp_path, sample_atoms_list):
+    """Tests only per-atom properties are read into the Atoms arrays."""
+
+    test_file = tmp_path / "test.h5"
 
-def test_immutable_property_warning(tmp_path, sample_atoms_list):
+    traj = ASEH5Trajectory(immutable=["framework"], mutable=["mol-id"])
+    traj.write(sample_atoms_list, test_file)
+
+    for orig, read in zip(sample_atoms_list, traj.read(test_file)):
+        assert set(read.arrays) == set(orig.arrays)
+        assert np.array_equal(orig.arrays["mol-id"], read.arrays["mol-id"])
+
+
+def test_immutable_property_warning(tmp_path, sample_atoms_list, rng):
     """Tests warning when an immutable property changes between frames."""
 
     test_file = tmp_path / "test.h5"
-    sample_atoms_list[5].arrays["framework"] = np.random.randint(1, 10, size=10)
+    sample_atoms_list[5].arrays["framework"] = rng.integers(1, 10, size=10)
 
     traj = ASEH5Trajectory(immutable=["framework"], mutable=["positions"])
 
@@ -75,11 +360,12 @@ def test_immutable_property_warning(tmp_path, sample_atoms_list):
         traj.write(sample_atoms_list, test_file)
 
 
-def test_missing_mutable_property_error(tmp_path, sample_atoms_list):
+@pytest.mark.parametrize("frame", [0, 5])
+def test_missing_mutable_property_error(tmp_path, sample_atoms_list, frame):
     """Tests error when a mutable property is missing in a frame."""
 
     test_file = tmp_path / "test.h5"
-    del sample_atoms_list[5].arrays["positions"]
+    del sample_atoms_list[frame].arrays["positions"]
 
     traj = ASEH5Trajectory(immutable=["numbers"], mutable=["positions"])
 
@@ -89,6 +375,66 @@ def test_missing_mutable_property_error(tmp_path, sample_atoms_list):
         traj.write(sample_atoms_list, test_file)
 
 
+def test_mutable_strings_widened(tmp_path, sample_atoms_list):
+    """Tests mutable strings are stored with the widest length of any frame."""
+
+    test_file = tmp_path / "test.h5"
+    for i, atoms in enumerate(sample_atoms_list):
+        atoms.arrays["label"] = np.array(
+            ["H", "O"] * 5 if i < 5 else ["He"] * 10
+        )
+
+    traj = ASEH5Trajectory(mutable=["label"])
+    traj.write(sample_atoms_list, test_file)
+
+    for orig, read in zip(sample_atoms_list, traj.read(test_file)):
+        assert np.array_equal(orig.arrays["label"], read.arrays["label"])
+
+
+def test_mutable_ints_promoted(tmp_path, sample_atoms_list):
+    """Tests mutable integers are stored as floats if any frame has floats."""
+
+    test_file = tmp_path / "test.h5"
+    for atoms in sample_atoms_list:
+        atoms.info["temperature"] = 300
+    sample_atoms_list[5].info["temperature"] = 300.5
+
+    traj = ASEH5Trajectory(mutable=["temperature"])
+    traj.write(sample_atoms_list, test_file)
+
+    with h5py.File(test_file, "r") as h5file:
+        assert h5file["mutable/temperature"].dtype == np.float32
+
+    temperatures = [atoms.info["temperature"] for atoms in sample_atoms_list]
+    read_atoms_list = traj.read(test_file)
+    assert [atoms.arrays["temperature"] for atoms in read_atoms_list] == (
+        temperatures
+    )
+
+
+@pytest.mark.parametrize(
+    "first, other, match",
+    [
+        (np.zeros((10, 3)), np.zeros((1, 3)), "does not match the shape"),
+        (np.arange(2), np.array(["a", "b"]), "cannot be stored"),
+    ],
+)
+def test_mutable_frame_mismatch_error(
+    tmp_path, sample_atoms_list, first, other, match
+):
+    """Tests error when a frame cannot be stored like the first frame."""
+
+    test_file = tmp_path / "test.h5"
+    for atoms in sample_atoms_list:
+        atoms.info["extra"] = first
+    sample_atoms_list[5].info["extra"] = other
+
+    traj = ASEH5Trajectory(mutable=["extra"])
+
+    with pytest.raises(ValueError, match=match):
+        traj.write(sample_atoms_list, test_file)
+
+
 def test_empty_atoms_list(tmp_path):
     """Tests writing an empty list of ASE Atoms objects."""
 
@@ -114,6 +460,24 @@ def test_info_keys(tmp_path, sample_atoms_list):
         atoms.info["energy"] == float(i)
         for i, atoms in enumerate(read_atoms_list)
     )
+    assert all(type(atoms.info["energy"]) is float for atoms in read_atoms_list)
+
+
+def test_info_keys_non_float(tmp_path, sample_atoms_list):
+    """Tests writing/reading integer and vector info keys."""
+
+    test_file = tmp_path / "test.h5"
+    for i, atoms in enumerate(sample_atoms_list):
+        atoms.info["step"] = i
+        atoms.info["stress"] = np.full(6, float(i))
+
+    traj = ASEH5Trajectory(info_keys=["step", "stress"])
+    traj.write(sample_atoms_list, test_file)
+
+    for i, atoms in enumerate(traj.read(test_file)):
+        assert atoms.info["step"] == i
+        assert type(atoms.info["step"]) is int
+        assert np.array_equal(atoms.info["stress"], np.full(6, i))
 
 
 def test_info_keys_warning(tmp_path, sample_atoms_list):
@@ -129,29 +493,47 @@ def test_info_keys_warning(tmp_path, sample_atoms_list):
         traj.write(sample_atoms_list, test_file)
 
 
-def test_immutable_property_handling(tmp_path):
+def test_info_keys_strings_warning(tmp_path, sample_atoms_list):
+    """Tests string info keys, and the warning when one is missing."""
+
+    test_file = tmp_path / "test.h5"
+    for i, atoms in enumerate(sample_atoms_list):
+        atoms.info["label"] = f"frame-{i}"
+    del sample_atoms_list[3].info["label"]
+
+    traj = ASEH5Trajectory(info_keys=["label"])
+
+    with pytest.warns(UserWarning, match="Some frames missing 'label' info."):
+        traj.write(sample_atoms_list, test_file)
+
+    read_atoms_list = traj.read(test_file)
+    assert read_atoms_list[0].info["label"] == "frame-0"
+    assert read_atoms_list[9].info["label"] == "frame-9"
+
+
+def test_immutable_property_handling(tmp_path, rng):
     """Tests behavior when immutable properties are missing in some frames."""
 
     test_file = tmp_path / "test.h5"
 
     # Create an immutable cell
-    cell = np.random.rand(3, 3)
-    numbers = np.random.randint(1, 10, size=10)
+    cell = rng.random((3, 3))
+    numbers = rng.integers(1, 10, size=10)
 
     # Generate atoms list
     atoms_list = []
     for i in range(10):
         atoms = ase.Atoms(
             numbers=numbers,
-            positions=np.random.rand(10, 3),
+            positions=rng.random((10, 3)),
             cell=cell,
         )
 
         # Ensure some frames are missing an immutable property
         if i % 2 == 0:
-            atoms.arrays["framework"] = np.random.randint(1, 10, size=10)
+            atoms.arrays["framework"] = rng.integers(1, 10, size=10)
         else:
-            atoms.arrays["framework"] = np.random.randint(20, 30, size=10)
+            atoms.arrays["framework"] = rng.integers(20, 30, size=10)
 
         atoms_list.append(atoms)
 
@@ -172,7 +554,7 @@ def test_immutable_property_handling(tmp_path):
     # Verify that the read data contains numbers and positions
     assert len(read_atoms_list) == len(atoms_list)
     for orig, read in zip(atoms_list, read_atoms_list):
-        np.testing.assert_array_equal(orig.numbers, read.numbers)
+        assert np.array_equal(orig.numbers, read.numbers)
         np.testing.assert_allclose(orig.positions, read.positions)
 
         # Check framework existence
@@ -182,22 +564,22 @@ def test_immutable_property_handling(tmp_path):
             assert "framework" not in read.arrays
 
 
-def test_missing_immutable_property(tmp_path):
+def test_missing_immutable_property(tmp_path, rng):
     """Tests behavior when an immutable property is missing in first frame."""
 
     test_file = tmp_path / "test.h5"
 
     # Create an immutable cell
-    cell = np.random.rand(3, 3)
-    numbers = np.random.randint(1, 10, size=10)
-    framework = np.random.randint(1, 10, size=10)
+    cell = rng.random((3, 3))
+    numbers = rng.integers(1, 10, size=10)
+    framework = rng.integers(1, 10, size=10)
 
     # Generate atoms list
     atoms_list = []
     for i in range(10):
         atoms = ase.Atoms(
             numbers=numbers,
-            positions=np.random.rand(10, 3),
+            positions=rng.random((10, 3)),
             cell=cell,
         )
 
@@ -234,10 +616,28 @@ def test_conflicting_keys():
         validate_keys(["shared_key"], ["shared_key"])
 
 
+def test_keys_as_tuples():
+    """Tests keys may be given as tuples as well as lists."""
+
+    traj = ASEH5Trajectory(immutable=("tags",), mutable=("momenta",))
+    assert traj.immutable == ("tags", "numbers")
+    assert traj.mutable == ("momenta", "positions")
+
+
+def test_validate_keys_order():
+    """Tests keys keep the order they were first given in."""
+
+    immutable, mutable = validate_keys(["b", "a", "b"], ["d", "c", "d"])
+    assert immutable == ("b", "a")
+    assert mutable == ("d", "c")
+
+
 def test_numbers_in_mutable():
     """Test if 'numbers' in mutable is removed from immutable."""
 
     immutable, mutable = validate_keys(["numbers"], ["numbers", "extra"])
+    assert immutable == ()
+    assert mutable == ("numbers", "extra")
     assert "numbers" not in immutable
     assert "extra" in mutable  # Ensure other mutable keys are still there
 
@@ -267,6 +667,202 @@ def test_read_no_cell_sets_no_pbc(tmp_path):
     assert not atoms_list[0].pbc.any()  # pbc should not be set.
 
 
+def test_cells_equal(rng):
+    """Tests cells are compared exactly, then within tolerance."""
+
+    cell = rng.random((3, 3))
+    assert cells_equal(cell, cell.copy())
+    assert cells_equal(cell + 1e-12, cell)
+    assert not cells_equal(cell + 1e-3, cell)
+
+    cells = np.stack([cell, cell + 1e-12, cell])
+    assert cells_equal(cells, cell)
+    cells[1] += 1e-3
+    assert not cells_equal(cells, cell)
+
+
+@pytest.mark.parametrize(
+    "framework, changed",
+    [
+        (None, False),
+        (np.arange(5), False),
+        (np.arange(5) + 1, True),
+        (np.arange(6), True),
+    ],
+)
+def test_check_immutable_consistency(framework, changed):
+    """Tests changes are detected in any block of frames."""
+
+    atoms_list = [ase.Atoms("H5", positions=np.zeros((5, 3))) for _ in range(8)]
+    for atoms in atoms_list:
+        atoms.arrays["framework"] = np.arange(5)
+    del atoms_list[2].arrays["framework"]
+    atoms_list[6].info["framework"] = framework
+    if framework is not None:
+        atoms_list[6].arrays.pop("framework")
+
+    with warnings.catch_warnings(record=True) as record:
+        warnings.simplefilter("always")
+        check_immutable_consistency(
+            atoms_list, "framework", np.arange(5), block_size=3
+        )
+
+    assert len(record) == int(changed)
+
+
+@pytest.mark.parametrize("n_atoms, expected", [(5, 9), (100_000, 1)])
+def test_check_immutable_consistency_block_bytes(
+    monkeypatch, n_atoms, expected
+):
+    """Tests frames are stacked in blocks of about CHUNK_BYTES of data."""
+
+    atoms_list = [ase.Atoms(numbers=np.ones(n_atoms, int)) for _ in range(10)]
+    stacked = []
+    stack = np.stack
+
+    def record_stack(arrays):
+        stacked.append(len(arrays))
+        return stack(arrays)
+
+    monkeypatch.setattr(core.np, "stack", record_stack)
+    check_immutable_consistency(atoms_list, "numbers", np.ones(n_atoms, int))
+
+    assert max(stacked) == expected
+
+
+def test_check_immutable_consistency_shared():
+    """
+    Tests a changed frame is still caught among frames that share the first
+    frame's data, which are skipped by identity.
+    """
+
+    framework = np.arange(5)
+    atoms_list = [ase.Atoms("H5", positions=np.zeros((5, 3))) for _ in range(8)]
+    for atoms in atoms_list:
+        atoms.arrays["framework"] = framework
+    atoms_list[5].arrays["framework"] = framework + 1
+
+    with pytest.warns(UserWarning, match="'framework' changes"):
+        check_immutable_consistency(
+            atoms_list, "framework", framework, block_size=3
+        )
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+@pytest.mark.parametrize("shuffle", [False, True])
+@pytest.mark.parametrize(
+    "frames", [None, slice(0, 10), slice(2, 7), slice(4, 5), slice(9, 10)]
+)
+def test_read_dataset(tmp_path, compression, shuffle, frames, rng):
+    """Tests reading frames, with chunks decompressed on a thread pool."""
+
+    data = rng.random((10, 4, 3))
+    expected = data if frames is None else data[frames]
+
+    with h5py.File(tmp_path / "test.h5", "w") as h5file:
+        dset = h5file.create_dataset(
+            "data",
+            data=data,
+            chunks=(3, 4, 3),
+            compression=compression,
+            shuffle=shuffle,
+        )
+        np.testing.assert_array_equal(read_dataset(dset, frames), expected)
+        with ThreadPoolExecutor(2) as executor:
+            np.testing.assert_array_equal(
+                read_dataset(dset, frames, executor), expected
+            )
+
+
+def test_get_property():
+    """Tests properties are taken from the arrays before the info."""
+
+    atoms = ase.Atoms("H2", positions=np.zeros((2, 3)))
+    atoms.arrays["charge"] = np.ones(2)
+    atoms.info["charge"] = 0.0
+    atoms.info["energy"] = 1.0
+
+    np.testing.assert_array_equal(get_property(atoms, "charge"), np.ones(2))
+    assert get_property(atoms, "energy") == 1.0
+    assert get_property(atoms, "missing") is None
+
+
+@pytest.mark.parametrize("chunks", [None, (3, 4, 3)])
+def test_read_dataset_mmap(tmp_path, chunks, rng):
+    """Tests only contiguous datasets are memory-mapped."""
+
+    data = rng.random((10, 4, 3))
+    with h5py.File(tmp_path / "test.h5", "w") as h5file:
+        h5file.create_dataset("data", data=data, chunks=chunks)
+
+    with h5py.File(tmp_path / "test.h5", "r") as h5file:
+        mapped = read_dataset(h5file["data"], slice(2, 7), mmap=True)
+
+    assert mapped.flags.owndata == (chunks is not None)
+    np.testing.assert_array_equal(mapped, data[2:7])
+
+    # the map is copy-on-write, leaving the file unchanged.
+    mapped += 1.0
+    with h5py.File(tmp_path / "test.h5", "r") as h5file:
+        np.testing.assert_array_equal(h5file["data"][()], data)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_read_mmap(tmp_path, sample_atoms_list, lazy):
+    """Tests reading a contiguous, uncompressed file by memory-mapping it."""
+
+    test_file = tmp_path / "test.h5"
+
+    traj = ASEH5Trajectory(dtype_overrides={"positions": "float64"})
+    traj.write(sample_atoms_list, test_file, compression=None, chunks=None)
+    read_atoms_list = list(traj.read(test_file, lazy=lazy, mmap=True))
+
+    for orig, read in zip(sample_atoms_list, read_atoms_list):
+        assert np.array_equal(orig.positions, read.positions)
+        np.testing.assert_allclose(orig.cell.array, read.cell.array)
+
+    read_atoms_list[0].positions += 1.0
+    np.testing.assert_array_equal(
+        sample_atoms_list[1].positions, read_atoms_list[1].positions
+    )
+
+
+def test_frame_chunks():
+    """Tests chunk shapes only split the frame axis."""
+
+    assert frame_chunks((100_000, 1000, 3), 4) == (87, 1000, 3)
+    assert frame_chunks((100_000, 1000, 3), 4, 10) == (10, 1000, 3)
+    assert frame_chunks((100_000, 1000, 3), 4, None) is None
+    assert frame_chunks((10,), 8) == (10,)
+    assert frame_chunks((100_000,), 8) == (4096,)
+    assert frame_chunks((5, 0, 3), 4) is None
+
+
+@pytest.mark.parametrize("compression", [None, "gzip"])
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_frame_buffer(tmp_path, compression, shuffle, rng):
+    """Tests frames are written in chunk-sized blocks."""
+
+    data = rng.random((10, 4, 3))
+    with h5py.File(tmp_path / "test.h5", "w") as h5file:
+        dset = h5file.create_dataset(
+            "data",
+            shape=data.shape,
+            dtype=float,
+            chunks=(3, 4, 3),
+            compression=compression,
+            shuffle=shuffle,
+        )
+        buffer = FrameBuffer(dset)
+        assert buffer.direct == (compression is None and not shuffle)
+        for i, frame in enumerate(data):
+            buffer.append(frame)
+            assert buffer.start == 3 * ((i + 1) // 3)
+        buffer.flush()
+
+        np.testing.assert_allclose(dset[()], data)
+
+
 ########## TEST CONVERSIONS ##########
 
 
@@ -275,6 +871,7 @@ def test_convert_float_scalar():
     result = convert_dtype(val, np.float32)
     assert isinstance(result, np.float32)
     assert result == np.float32(3.14)
+    assert isinstance(convert_dtype(val, np.dtype("float32")), np.float32)
 
 
 def test_convert_float_array():
@@ -13,6 +13,7 @@ from ase_hdf5.utils import _get_file_size, get_file_size, human_readable_size
         (1048576, "1.00 MB", 1.00),
         (1073741824, "1.00 GB", 1.00),
         (1099511627776, "1.00 TB", 1.00),
+        (1125899906842624, "1024.00 TB", 1024.00),
     ],
 )
 def test_human_readable_size(size_bytes, expected_str, expected_float):
@@ -37,6 +38,7 @@ def test_human_readable_size(size_bytes, expected_str, expected_float):
         (1048576, "GB", "0.00 GB", 0.0009765625),
         (1073741824, "GB", "1.00 GB", 1.00),
         (1099511627776, "TB", "1.00 TB", 1.00),
+        (1073741824, "TB", "0.00 TB", 0.0009765625),
     ],
 )
 def test_human_readable_size_specific_units(
@@ -63,6 +65,7 @@ def test_get_file_size(tmp_path):
     test_file.write_text(test_content)
 
     assert _get_file_size(test_file) == 100
+    assert _get_file_size(str(test_file)) == 100
 
 
 def test_print_file_size(tmp_path):
@@ -75,3 +78,7 @@ def test_print_file_size(tmp_path):
     file_size = get_file_size(test_file)
 
     assert "2.00 KB" in file_size
+
+    # a known size is used without touching the file system.
+    missing_file = tmp_path / "missing.txt"
+    assert get_file_size(missing_file, size_bytes=2048) == file_size